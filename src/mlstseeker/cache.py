@@ -8,6 +8,8 @@ from google.cloud import bigquery
 from google.cloud.exceptions import NotFound
 
 from . import datasets
+from . import identity
+from . import locations
 from . import mlst
 
 BATCH = 25  # number of samples to cache at a time
@@ -16,16 +18,11 @@ DATASET = "mlst_seeker"
 
 def add_to_cache(cached_df: pd.DataFrame, metadata_df: pd.DataFrame, scheme: str) -> None:
     """Add new records to BigQuery for the given MLST scheme. Peform MLST
-    for samples in `metadata_df` that are not already in `cached_df`,
-    and add them to the BigQuery table.
+    for samples in `metadata_df` that are not already in `cached_df` (or
+    were typed from an older assembly version), and add them to the
+    BigQuery table.
     """
-    accessions = []
-    if cached_df is None:
-        create_table(scheme)
-        accessions = metadata_df["accession"].to_list()
-    else:
-        uncached_df = metadata_df[~(metadata_df["biosample"].isin(cached_df["biosample"]))]
-        accessions = uncached_df["accession"].to_list()
+    accessions = identity.get_untyped(metadata_df, cached_df)["accession"].to_list()
 
     batches = map(lambda i: accessions[i:i + BATCH], range(0, len(accessions), BATCH))
     create_table(scheme)
@@ -60,6 +57,9 @@ def create_table(scheme: str) -> None:
         bigquery.SchemaField("biosample", "STRING"),
         bigquery.SchemaField("source_database", "STRING"),
         bigquery.SchemaField("location", "STRING"),
+        bigquery.SchemaField("country", "STRING"),
+        bigquery.SchemaField("region", "STRING"),
+        bigquery.SchemaField("locality", "STRING"),
         bigquery.SchemaField("collection_date", "STRING"),
         bigquery.SchemaField("scheme", "STRING"),
         bigquery.SchemaField("sequence_type", "STRING"),
@@ -74,12 +74,17 @@ def create_table(scheme: str) -> None:
 
 
 def add_column_all_tables(column_name: str, dtype: str) -> None:
-    """Add a column to all BigQuery tables with the given data type."""
+    """Add a column to all BigQuery tables with the given data type. Tables
+    that already have the column are skipped.
+    """
     client = bigquery.Client()
     table_ids = get_all_table_ids()
     for table_id in table_ids:
         table = client.get_table(table_id)
         schema = table.schema
+        if any(field.name == column_name for field in schema):
+            logging.info("Column %s already exists in %s", column_name, table_id)
+            continue
         schema.append(bigquery.SchemaField(column_name, dtype.upper()))
         table.schema = schema
         client.update_table(table, ["schema"])
@@ -113,7 +118,11 @@ def insert_rows(df: pd.DataFrame) -> None:
     client = bigquery.Client()
     scheme = df["scheme"].iloc[0]
     table_id = get_table_id(scheme)
-    job = client.load_table_from_dataframe(df, table_id)
+    # tables created by older versions may lack newer metadata columns
+    config = bigquery.LoadJobConfig(
+        schema_update_options=[bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION]
+    )
+    job = client.load_table_from_dataframe(df, table_id, job_config=config)
     job.result()
 
 
@@ -124,6 +133,8 @@ def get_table(scheme: str) -> pd.DataFrame:
     client = bigquery.Client()
     query = "SELECT * FROM {}".format(table_id)
     df = client.query(query).to_dataframe().astype("string")
+    # tables created before location normalization lack parsed columns
+    df = locations.normalize(df)
     logging.info("Downloaded %s cached MLST results", df.shape[0])
     return df
 
@@ -136,4 +147,5 @@ def get_table_id(scheme: str) -> str:
 
 if __name__ == "__main__":
     dotenv.load_dotenv()
-    print(add_column_all_tables("organism", "STRING"))
+    for column in ("country", "region", "locality"):
+        add_column_all_tables(column, "STRING")
@@ -1,6 +1,8 @@
 """Parse command-line arguments."""
 import argparse
 
+from . import identity
+
 
 def parse_args():
     """Parse input arguments."""
@@ -47,6 +49,12 @@ def parse_subcommands(parser):
             required=True,
             help="PubMLST scheme name"
         )
+        subparsers.choices[subcommand].add_argument(
+            "--assembly-policy",
+            choices=identity.POLICIES.keys(),
+            default=identity.DEFAULT_POLICY,
+            help="how to choose one assembly per BioSample: latest release or most complete (default: %(default)s)"
+        )
 
     for subcommand in ("preview", "fetch"):
         subparsers.choices[subcommand].add_argument(
@@ -75,6 +83,16 @@ def parse_subcommands(parser):
         action=argparse.BooleanOptionalAction,
         help="only report cached MLST results"
     )
+    subparsers.choices["fetch"].add_argument(
+        "--limit",
+        type=positive_int,
+        help="stop downloading and typing genomes after this many matches"
+    )
+    subparsers.choices["fetch"].add_argument(
+        "--sort",
+        choices=("newest", "oldest"),
+        help="order in which genomes are reported and typed, by collection date"
+    )
 
     return parser
 
@@ -82,4 +100,15 @@ def validate_collect_dates(options):
     if options.collect_start and not options.collect_start.isnumeric():
         raise ValueError("Invalid start year")
     if options.collect_end and not options.collect_end.isnumeric():
-        raise ValueError("Invalid end year")
\ No newline at end of file
+        raise ValueError("Invalid end year")
+
+
+def positive_int(value: str) -> int:
+    """Parse a command-line value as an integer of at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: '{value}'")
+    return number
@@ -13,6 +13,8 @@ import zipfile
 from tqdm.auto import tqdm
 from typing import Optional, Self
 
+from . import locations
+
 BASEURL = "https://api.ncbi.nlm.nih.gov/datasets/v2alpha"
 TIMEOUT = 30  # seconds until request timeout
 
@@ -43,6 +45,7 @@ class Report:
             raise ValueError("Must provide organism or records")
         if (organism is None and records is None):
             raise ValueError("Must provide organism or records, but not both")
+        self._location_index: locations.LocationIndex | None = None
         if records is not None:
             self.records = records
             return
@@ -73,18 +76,20 @@ class Report:
     def filter_by_location(self, location: str) -> Self:
         """Filter based on the geo_loc_name BioSample attribute.
 
+        Locations are compared after normalization, so "United States"
+        matches "USA" and "USA: PA" matches "USA: Philadelphia, PA".
+
         Args:
             location (str): geo_loc_name following INSDC qualifier formatting
 
         Returns:
             list[dict]: new Report after filtering
         """
-        filtered_records = []
-        for record in self.records:
-            geo_loc_name = self.get_attribute(record, "geo_loc_name")
-            if geo_loc_name and geo_loc_name.startswith(location):
-                filtered_records.append(record)
-        return Report(records=filtered_records)
+        if self._location_index is None:
+            self._location_index = locations.LocationIndex.from_locations(
+                [self.get_location(record) for record in self.records])
+        positions = self._location_index.lookup(location)
+        return Report(records=[self.records[i] for i in positions])
     
     def filter_by_year(self, start: int | None, end: int | None) -> Self:
         """Filter based on the collection_date BioSample attribute.
@@ -127,9 +132,14 @@ class Report:
                       if item["name"] == attribute), None)
         return record.get("value") if record else None
     
+    def get_location(self, record: dict) -> tuple[str | None, str | None, str | None]:
+        """Return the normalized (country, region, locality) of a record."""
+        return locations.parse(self.get_attribute(record, "geo_loc_name"))
+
     def get_metadata_dicts(self) -> list[dict]:
         """Get basic metadata as a list of dicts: accession, biosample,
-        source_database, organism, location, and collection_date.
+        source_database, organism, location, country, region, locality,
+        collection_date, release_date, assembly_level and contig_n50.
         """
         metadata_dicts = []
         for record in self.records:
@@ -143,7 +153,13 @@ class Report:
             metadata["source_database"] = record.get("source_database")
             metadata["organism"] = record.get("organism", {}).get("organism_name")
             metadata["location"] = self.get_attribute(record, "geo_loc_name")
+            metadata["country"], metadata["region"], metadata["locality"] = (
+                locations.parse(metadata["location"])
+            )
             metadata["collection_date"] = self.get_attribute(record, "collection_date")
+            metadata["release_date"] = record.get("assembly_info", {}).get("release_date")
+            metadata["assembly_level"] = record.get("assembly_info", {}).get("assembly_level")
+            metadata["contig_n50"] = record.get("assembly_stats", {}).get("contig_n50")
             metadata_dicts.append(metadata)
         return metadata_dicts
     
@@ -161,8 +177,11 @@ class Report:
         raise StopIteration
 
 
-def get_genomes(accessions: list[str]):
-    """Download genomes for the given `accessions` from NCBI Genome database."""
+def get_genomes(accessions: list[str], directory: str = "genomes", clear: bool = True):
+    """Download genomes for the given `accessions` from NCBI Genome database
+    to `directory`. Existing genomes in `directory` are removed first unless
+    `clear` is False.
+    """
     logging.info("Downloading %s genomes...", len(accessions))
     url = f"{BASEURL}/genome/download"
     obj = {
@@ -175,11 +194,30 @@ def get_genomes(accessions: list[str]):
 
     # TODO: Show approximate total file size. No Content-Length header since
     # using chunked Transfer-Encoding, so can maybe base it on genome size?
+    zip_path = f"{directory}.zip.gz"
     with tqdm.wrapattr(response.raw, "read") as raw_response:
-        with open("genomes.zip.gz", "wb") as f:
+        with open(zip_path, "wb") as f:
             shutil.copyfileobj(raw_response, f)
-    if os.path.exists("genomes"):
-        shutil.rmtree("genomes")
-    with gzip.open("genomes.zip.gz", "rb") as gz_file:
+    if clear and os.path.exists(directory):
+        shutil.rmtree(directory)
+    with gzip.open(zip_path, "rb") as gz_file:
         with zipfile.ZipFile(gz_file, "r") as temp_file:
-            temp_file.extractall("genomes")
+            temp_file.extractall(directory)
+    os.remove(zip_path)
+
+
+def move_genomes(accessions: list[str], source: str, destination: str):
+    """Move downloaded genomes for the given `accessions` from the `source`
+    directory to the `destination` directory without downloading them again.
+    """
+    destination_data = os.path.join(destination, "ncbi_dataset", "data")
+    os.makedirs(destination_data, exist_ok=True)
+    for accession in accessions:
+        genome_dir = os.path.join(source, "ncbi_dataset", "data", accession)
+        if not os.path.exists(genome_dir):
+            logging.warning("Genome %s not found in %s", accession, source)
+            continue
+        target = os.path.join(destination_data, accession)
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        shutil.move(genome_dir, target)
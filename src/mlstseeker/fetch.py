@@ -0,0 +1,143 @@
+"""Stream genomes matching a sequence type to a genomes directory and stdout."""
+import logging
+import os
+import shutil
+import sys
+import tempfile
+
+import pandas as pd
+
+from . import datasets
+from . import filters
+from . import identity
+from . import mlst
+
+BATCH = 25  # number of untyped genomes to download and type at a time
+GENOMES_DIR = "genomes"
+
+
+class MatchWriter:
+    """Write matches to stdout as TSV rows as soon as they are found."""
+    def __init__(self, limit: int | None = None, columns: list[str] | None = None):
+        """Create a writer that stops accepting matches after `limit` rows.
+
+        Args:
+            limit (int, optional): maximum number of matches. Defaults to None.
+            columns (list[str], optional): TSV columns. Defaults to the
+                columns of the first matches written.
+        """
+        self.limit = limit
+        self.columns = columns
+        self.count = 0
+
+    @property
+    def done(self) -> bool:
+        """Return whether `limit` matches have been written."""
+        return self.limit is not None and self.count >= self.limit
+
+    def write(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Write rows of `df` up to the limit and return the rows written."""
+        if self.limit is not None:
+            df = df.iloc[:max(self.limit - self.count, 0)]
+        if df.empty:
+            return df
+        if self.columns is None:
+            self.columns = df.columns.to_list()
+        df.reindex(columns=self.columns).to_csv(
+            sys.stdout, index=False, sep="\t", header=self.count == 0)
+        sys.stdout.flush()
+        self.count += df.shape[0]
+        return df
+
+
+def stream_matches(
+        options,
+        metadata_df: pd.DataFrame,
+        cached_df: pd.DataFrame | None,
+        filtered_metadata_df: pd.DataFrame,
+        filtered_cached_df: pd.DataFrame | None
+    ) -> None:
+    """Download genomes matching `options.type` and write their MLST results
+    and metadata to stdout.
+
+    Cached matches are written and downloaded first. Untyped genomes that
+    pass the metadata filters are then downloaded and typed in batches, and
+    each batch's matches are written as soon as it is typed. Stops once
+    `options.limit` matches have been found. `options.sort` orders cached
+    and newly typed matches separately. Cached matches waiting on a newer
+    assembly version are written last, outside that order, if the newer
+    version was not typed.
+    """
+    if os.path.exists(GENOMES_DIR):
+        shutil.rmtree(GENOMES_DIR)
+    columns = cached_df.columns.to_list() if cached_df is not None else None
+    writer = MatchWriter(options.limit, columns)
+    untyped_df = identity.get_untyped(filtered_metadata_df, cached_df)
+
+    pending_df = pd.DataFrame()
+    if filtered_cached_df is not None:
+        matches_df = sort(filters.filter_by_sequence_type(filtered_cached_df, options.type), options.sort)
+        if not options.cached_only:
+            # cached results for an older assembly version are held back
+            # until the newer version has been typed
+            retyping = untyped_df["biosample"].dropna()
+            pending = matches_df["biosample"].notna() & matches_df["biosample"].isin(retyping)
+            pending_df = matches_df[pending]
+            matches_df = matches_df[~pending]
+        write_cached(matches_df, writer, options.type)
+
+    if not options.cached_only and not writer.done and not untyped_df.empty:
+        logging.info("Found %s genomes on NCBI that have not been typed (use --cached-only to skip)",
+                     untyped_df.shape[0])
+        typed = type_untyped(sort(untyped_df, options.sort), metadata_df, options, writer)
+        if not pending_df.empty:
+            typed_biosamples = untyped_df.loc[untyped_df["accession"].isin(typed), "biosample"].dropna()
+            pending_df = pending_df[~pending_df["biosample"].isin(typed_biosamples)]
+    # cached results whose newer version was not reached are still matches
+    if not pending_df.empty:
+        write_cached(pending_df, writer, options.type)
+    logging.info("Found %s ST%s genomes", writer.count, options.type)
+
+
+def write_cached(matches_df: pd.DataFrame, writer: MatchWriter, sequence_type: str) -> None:
+    """Write cached matches with `writer` and download their genomes."""
+    written_df = writer.write(matches_df)
+    if not written_df.empty:
+        logging.info("Found %s cached ST%s genomes", written_df.shape[0], sequence_type)
+        datasets.get_genomes(written_df["accession"].to_list(), GENOMES_DIR, clear=False)
+
+
+def type_untyped(
+        untyped_df: pd.DataFrame,
+        metadata_df: pd.DataFrame,
+        options,
+        writer: MatchWriter
+    ) -> list[str]:
+    """Download and type genomes in `untyped_df` in batches, writing matches
+    with `writer` and keeping their genomes, until `writer` is done. Return
+    the accessions that were typed.
+    """
+    accessions = untyped_df["accession"].to_list()
+    typed = []
+    with tempfile.TemporaryDirectory() as typing_dir:
+        for i in range(0, len(accessions), BATCH):
+            if writer.done:
+                logging.info("Reached limit of %s genomes", writer.limit)
+                break
+            batch = accessions[i:i + BATCH]
+            logging.info("Typing %s/%s...", i + len(batch), len(accessions))
+            datasets.get_genomes(batch, typing_dir)
+            mlst_df = mlst.perform_mlst(options.scheme, typing_dir)
+            typed.extend(batch)
+            mlst_df = mlst.filter_mlst(mlst_df, options.type)
+            mlst_df = mlst.merge_with_metadata(mlst_df, metadata_df)
+            written_df = writer.write(sort(mlst_df, options.sort))
+            datasets.move_genomes(written_df["accession"].to_list(), typing_dir, GENOMES_DIR)
+    return typed
+
+
+def sort(df: pd.DataFrame, order: str | None) -> pd.DataFrame:
+    """Sort `df` by collection date if `order` is "newest" or "oldest"."""
+    if order is None:
+        return df
+    return filters.sort_by_collection_date(df, newest=order == "newest")
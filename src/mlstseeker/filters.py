@@ -1,20 +1,32 @@
 import pandas as pd
 
-def apply(df: pd.DataFrame, options):
+from . import locations
+
+def apply(
+        df: pd.DataFrame,
+        options,
+        location_index: locations.LocationIndex | None = None
+    ):
     if ((hasattr(options, "collect_start") and options.collect_start)
         or (hasattr(options, "collect_end") and options.collect_end)
     ):
         df = filter_by_year(df, start=int(options.collect_start))
     if hasattr(options, "location") and options.location:
-        df = filter_by_location(df, options.location)
+        df = filter_by_location(df, options.location, location_index)
     return df
 
 
-def filter_by_location(df: pd.DataFrame, location: str) -> pd.DataFrame:
-    """Return rows with the given location in `df`."""
-    filtered = df[df["location"].notna()]
-    filtered = filtered[filtered["location"].str.startswith(location)]
-    return filtered
+def filter_by_location(
+        df: pd.DataFrame,
+        location: str,
+        index: locations.LocationIndex | None = None
+    ) -> pd.DataFrame:
+    """Return rows within the given location in `df`. Pass a prebuilt
+    `index` for `df` to avoid building one for every query.
+    """
+    if index is None:
+        index = locations.LocationIndex(df)
+    return index.filter(df, location)
 
 
 def filter_by_year(
@@ -36,6 +48,20 @@ def filter_by_year(
     return filtered
 
 
+def sort_by_collection_date(df: pd.DataFrame, newest: bool = True) -> pd.DataFrame:
+    """Return `df` sorted by collection date, newest first unless `newest` is
+    False. Rows with unintelligible dates are placed last.
+    """
+    dates = pd.to_datetime(
+        df["collection_date"],
+        errors="coerce",
+        format="ISO8601",
+        utc=True,
+    ).reset_index(drop=True)
+    order = dates.sort_values(ascending=not newest, na_position="last", kind="stable").index
+    return df.iloc[order]
+
+
 def filter_by_sequence_type(df: pd.DataFrame, sequence_type: str) -> pd.DataFrame:
     """Return rows with the given `sequence_type` in `df`."""
     return df[df["sequence_type"] == sequence_type]
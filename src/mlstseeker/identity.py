@@ -0,0 +1,123 @@
+"""Identify genomes by BioSample, assembly and assembly version.
+
+A BioSample can have several GenBank assemblies (GCA_000000001,
+GCA_000000002, ...) and each assembly several versions (GCA_000000001.1,
+GCA_000000001.2, ...). Only one assembly per BioSample is downloaded and
+typed, chosen by an assembly policy, and a cached result is only replaced
+when a newer version of the same assembly is released.
+"""
+import pandas as pd
+
+ASSEMBLY_LEVELS = ("Contig", "Scaffold", "Chromosome", "Complete Genome")
+
+# columns (from highest to lowest priority) used to rank assemblies of a
+# BioSample; higher values are preferred
+POLICIES = {
+    "latest": ["_release_date", "version"],
+    "complete": ["_assembly_level", "_contig_n50", "_release_date", "version"],
+}
+DEFAULT_POLICY = "latest"
+
+
+def add_identity_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Return `df` with assembly (accession without version) and version
+    columns split from the accession column.
+    """
+    df = df.copy()
+    parts = df["accession"].astype("string").str.extract(r"^(?P<assembly>[^.]+)\.(?P<version>\d+)$")
+    df["assembly"] = parts["assembly"].fillna(df["accession"]).astype("string")
+    df["version"] = pd.to_numeric(parts["version"], errors="coerce").astype("Int64")
+    return df
+
+
+def get_genome_key(df: pd.DataFrame) -> pd.Series:
+    """Return the BioSample of each row, or the assembly if it has none."""
+    return df["biosample"].fillna(df["assembly"])
+
+
+def select_best(df: pd.DataFrame, policy: str = DEFAULT_POLICY) -> pd.DataFrame:
+    """Return the best assembly for each BioSample in metadata `df`.
+
+    Args:
+        df (pd.DataFrame): metadata with one row per GenBank assembly
+        policy (str): one of `POLICIES`
+
+    Returns:
+        pd.DataFrame: metadata with one row per BioSample, in original order
+
+    Raises:
+        ValueError: unknown policy
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Invalid assembly policy: {policy}")
+    ranks = pd.DataFrame(index=df.index)
+    ranks["version"] = add_identity_columns(df)["version"]
+    ranks["_release_date"] = pd.to_datetime(
+        _get_column(df, "release_date"), errors="coerce", format="ISO8601", utc=True)
+    ranks["_assembly_level"] = _get_column(df, "assembly_level").map(
+        {level: i for i, level in enumerate(ASSEMBLY_LEVELS)}).astype("Int64")
+    ranks["_contig_n50"] = pd.to_numeric(_get_column(df, "contig_n50"), errors="coerce")
+    return df[_keep_first_ranked(ranks, POLICIES[policy], get_genome_key(add_identity_columns(df)))]
+
+
+def dedupe_typed(df: pd.DataFrame) -> pd.DataFrame:
+    """Return MLST results in `df` keeping one result per BioSample.
+
+    Versions are only comparable within an assembly, so the highest version
+    of each assembly is kept first. If a BioSample was typed from more than
+    one assembly, the most recently typed one is kept.
+    """
+    identity_df = add_identity_columns(df)
+    last_updated = pd.to_datetime(
+        _get_column(df, "last_updated"), errors="coerce", format="ISO8601", utc=True)
+    ranks = pd.DataFrame({"version": identity_df["version"], "last_updated": last_updated})
+    genome_keys = get_genome_key(identity_df)
+    assembly_keys = genome_keys + "/" + identity_df["assembly"]
+    latest_versions = _keep_first_ranked(ranks, ["version", "last_updated"], assembly_keys)
+    latest = _keep_first_ranked(ranks[latest_versions], ["last_updated", "version"],
+                                genome_keys[latest_versions])
+    keep = latest_versions.copy()
+    keep[latest_versions] = latest
+    return df[keep]
+
+
+def get_untyped(metadata_df: pd.DataFrame, cached_df: pd.DataFrame | None) -> pd.DataFrame:
+    """Return rows of `metadata_df` that need MLST performed.
+
+    A genome needs typing if its BioSample has not been typed, or if the
+    cached result is for an older version of the same assembly. BioSamples
+    typed from a different assembly are not typed again.
+    """
+    if cached_df is None or cached_df.empty:
+        return metadata_df
+    df = add_identity_columns(metadata_df)
+    typed = add_identity_columns(dedupe_typed(cached_df))
+    typed = typed[typed["biosample"].notna()].set_index("biosample")
+    typed_assembly = df["biosample"].map(typed["assembly"])
+    typed_version = df["biosample"].map(typed["version"]).astype("Int64")
+    needed = (
+        typed_assembly.isna()
+        | ((df["assembly"] == typed_assembly) & (df["version"] > typed_version)).fillna(False)
+    )
+    needed &= ~df["accession"].isin(cached_df["accession"])
+    return metadata_df.loc[needed.astype(bool)]
+
+
+def _get_column(df: pd.DataFrame, column: str) -> pd.Series:
+    """Return `column` of `df`, or an empty column if it does not exist."""
+    if column in df.columns:
+        return df[column]
+    return pd.Series(pd.NA, index=df.index, dtype="string")
+
+
+def _keep_first_ranked(ranks: pd.DataFrame, columns: list[str], keys: pd.Series):
+    """Return a boolean mask (as a numpy array) of the highest ranked row
+    for each of `keys`. Works with duplicate index labels.
+    """
+    ranks = ranks.reset_index(drop=True)
+    keys = keys.reset_index(drop=True)
+    ranks = ranks.sort_values(columns, ascending=False, na_position="last", kind="stable")
+    best = ranks.index[~keys.loc[ranks.index].duplicated()]
+    mask = pd.Series(False, index=keys.index)
+    mask.loc[best] = True
+    return mask.to_numpy()
@@ -0,0 +1,255 @@
+"""Normalize and index INSDC geo_loc_name values.
+
+INSDC formats geo_loc_name as "Country: region, locality", but submitters use
+many variants ("United States", "USA:PA", "USA: Philadelphia, PA"). Locations
+are parsed once into canonical (country, region, locality) values so that
+filters can look them up in a `LocationIndex` instead of scanning raw strings.
+"""
+import functools
+import re
+
+import pandas as pd
+
+LEVELS = ("country", "region", "locality")
+MISSING = "missing"  # key used for counts of samples without a location
+
+# alternative spellings mapped to the INSDC country name
+COUNTRY_ALIASES = {
+    "us": "USA",
+    "u.s.": "USA",
+    "u.s.a.": "USA",
+    "united states": "USA",
+    "united states of america": "USA",
+    "uk": "United Kingdom",
+    "u.k.": "United Kingdom",
+    "great britain": "United Kingdom",
+    "england": "United Kingdom",
+    "scotland": "United Kingdom",
+    "wales": "United Kingdom",
+    "northern ireland": "United Kingdom",
+    "people's republic of china": "China",
+    "prc": "China",
+    "republic of korea": "South Korea",
+    "korea, republic of": "South Korea",
+    "korea": "South Korea",
+    "russian federation": "Russia",
+    "the netherlands": "Netherlands",
+    "holland": "Netherlands",
+    "czech republic": "Czechia",
+    "viet nam": "Viet Nam",
+    "vietnam": "Viet Nam",
+    "ivory coast": "Cote d'Ivoire",
+    "côte d'ivoire": "Cote d'Ivoire",
+}
+
+# regions that are folded into a country alias, e.g. "England" -> UK: England
+COUNTRY_ALIAS_REGIONS = {
+    "england": "England",
+    "scotland": "Scotland",
+    "wales": "Wales",
+    "northern ireland": "Northern Ireland",
+}
+
+US_STATES = {
+    "AL": "Alabama", "AK": "Alaska", "AZ": "Arizona", "AR": "Arkansas",
+    "CA": "California", "CO": "Colorado", "CT": "Connecticut",
+    "DE": "Delaware", "DC": "District of Columbia", "FL": "Florida",
+    "GA": "Georgia", "HI": "Hawaii", "ID": "Idaho", "IL": "Illinois",
+    "IN": "Indiana", "IA": "Iowa", "KS": "Kansas", "KY": "Kentucky",
+    "LA": "Louisiana", "ME": "Maine", "MD": "Maryland",
+    "MA": "Massachusetts", "MI": "Michigan", "MN": "Minnesota",
+    "MS": "Mississippi", "MO": "Missouri", "MT": "Montana",
+    "NE": "Nebraska", "NV": "Nevada", "NH": "New Hampshire",
+    "NJ": "New Jersey", "NM": "New Mexico", "NY": "New York",
+    "NC": "North Carolina", "ND": "North Dakota", "OH": "Ohio",
+    "OK": "Oklahoma", "OR": "Oregon", "PA": "Pennsylvania",
+    "PR": "Puerto Rico", "RI": "Rhode Island", "SC": "South Carolina",
+    "SD": "South Dakota", "TN": "Tennessee", "TX": "Texas", "UT": "Utah",
+    "VT": "Vermont", "VA": "Virginia", "WA": "Washington",
+    "WV": "West Virginia", "WI": "Wisconsin", "WY": "Wyoming",
+}
+US_STATE_NAMES = {name.casefold(): name for name in US_STATES.values()}
+
+# values submitters use in place of a location
+NULL_VALUES = {"", "missing", "not collected", "not applicable", "not provided",
+               "unknown", "na", "n/a", "none", "restricted access"}
+
+
+@functools.lru_cache(maxsize=None)
+def parse(geo_loc_name: str | None) -> tuple[str | None, str | None, str | None]:
+    """Parse a geo_loc_name value into canonical (country, region, locality).
+
+    Args:
+        geo_loc_name (str | None): geo_loc_name following INSDC formatting
+
+    Returns:
+        tuple: canonical country, region and locality (each may be None)
+    """
+    if geo_loc_name is None or pd.isna(geo_loc_name):
+        return (None, None, None)
+    country, _, rest = str(geo_loc_name).partition(":")
+    country = _clean(country)
+    if country is None or country.casefold() in NULL_VALUES:
+        return (None, None, None)
+    parts = [p for p in (_clean(p) for p in re.split(r"[,;]", rest)) if p]
+
+    alias_region = COUNTRY_ALIAS_REGIONS.get(country.casefold())
+    if alias_region:
+        parts.insert(0, alias_region)
+    country = COUNTRY_ALIASES.get(country.casefold(), country)
+
+    region = None
+    if country == "USA":
+        region = _pop_us_state(parts)
+    elif parts:
+        region = parts.pop(0)
+    locality = ", ".join(parts) or None
+    return (country, region, locality)
+
+
+def normalize(df: pd.DataFrame | None) -> pd.DataFrame | None:
+    """Return `df` with country, region and locality columns parsed from the
+    location column. Only rows without a parsed country are parsed, so this
+    is cheap for metadata that has been normalized before.
+    """
+    if df is None:
+        return None
+    if all(level in df.columns for level in LEVELS):
+        unparsed = df["location"].notna() & df["country"].isna()
+        if not unparsed.any():
+            return df
+    else:
+        unparsed = pd.Series(True, index=df.index)
+    df = df.copy()
+    parsed = pd.DataFrame(
+        df.loc[unparsed, "location"].map(parse).to_list(),
+        columns=list(LEVELS),
+        index=df.index[unparsed],
+        dtype="string",
+    )
+    for level in LEVELS:
+        if level not in df.columns:
+            df[level] = pd.Series(pd.NA, index=df.index, dtype="string")
+        df.loc[unparsed, level] = df.loc[unparsed, level].fillna(parsed[level])
+    return df
+
+
+def get_key(
+        country: str | None,
+        region: str | None = None,
+        locality: str | None = None
+    ) -> tuple[str, ...]:
+    """Return the case-insensitive hierarchy key for a parsed location.
+
+    A missing region is kept as an empty slot when there is a locality, so
+    "USA: Philadelphia" does not widen to every USA location.
+    """
+    if country is None or pd.isna(country):
+        return ()
+    key = [
+        "" if value is None or pd.isna(value) else str(value).casefold()
+        for value in (country, region, locality)
+    ]
+    while key and not key[-1]:
+        key.pop()
+    return tuple(key)
+
+
+def get_index_keys(key: tuple[str, ...]) -> list[tuple[str, ...]]:
+    """Return every key a location should be indexed under: each prefix of
+    its hierarchy key, and the locality without its region so that queries
+    like "USA: Philadelphia" match "USA: Philadelphia, PA".
+    """
+    index_keys = [key[:depth] for depth in range(1, len(key) + 1)]
+    if len(key) == 3 and key[1]:
+        index_keys.append((key[0], "", key[2]))
+    return index_keys
+
+
+class LocationIndex:
+    """Prefix index over the country > region > locality hierarchy.
+
+    Maps every prefix of each row's location key to the row labels in the
+    DataFrame, so filtering by a location is a dict lookup.
+    """
+    def __init__(self, df: pd.DataFrame | None):
+        """Build the index from the normalized location columns of `df`."""
+        self.groups: dict[tuple[str, ...], pd.Index] = {}
+        if df is None or df.empty:
+            return
+        df = normalize(df)
+        self.set_keys(pd.Series(
+            [get_key(*row) for row in df[list(LEVELS)].itertuples(index=False)],
+            index=df.index,
+        ))
+
+    @classmethod
+    def from_locations(cls, parsed: list[tuple]) -> "LocationIndex":
+        """Build an index over parsed (country, region, locality) tuples,
+        labelled by their position in `parsed`.
+        """
+        index = cls(None)
+        index.set_keys(pd.Series([get_key(*location) for location in parsed], dtype=object))
+        return index
+
+    def set_keys(self, keys: pd.Series) -> None:
+        """Index each label of `keys` under its hierarchy key, replacing any
+        existing groups.
+        """
+        labels: dict[tuple[str, ...], list] = {}
+        for label, key in keys.items():
+            for index_key in get_index_keys(key):
+                labels.setdefault(index_key, []).append(label)
+        self.groups = {key: pd.Index(rows) for key, rows in labels.items()}
+
+    def lookup(self, location: str) -> pd.Index:
+        """Return row labels for rows within `location`.
+
+        Args:
+            location (str): geo_loc_name following INSDC qualifier formatting,
+                e.g. "USA", "United States: PA" or "USA: Pennsylvania"
+
+        Returns:
+            pd.Index: labels of matching rows (empty if none match)
+        """
+        key = get_key(*parse(location))
+        return self.groups.get(key, pd.Index([]))
+
+    def filter(self, df: pd.DataFrame, location: str) -> pd.DataFrame:
+        """Return rows of `df` (the indexed DataFrame) within `location`."""
+        return df.loc[df.index.intersection(self.lookup(location))]
+
+
+def count_by_country(df: pd.DataFrame | None) -> dict[str, int]:
+    """Return the number of rows in `df` for each canonical country, using
+    the country column stored by `normalize`.
+    """
+    if df is None or df.empty:
+        return {}
+    counts = df["country"].value_counts(dropna=False)
+    return {
+        (MISSING if pd.isna(country) else country): int(count)
+        for country, count in counts.items()
+    }
+
+
+def _pop_us_state(parts: list[str]) -> str | None:
+    """Remove and return the US state from the parts of a location.
+
+    States usually come last ("City, ST"), so parts are scanned from the end,
+    and abbreviations are preferred over state names that are also cities
+    (e.g. "Washington, DC" or "New York, NY").
+    """
+    for i in reversed(range(len(parts))):
+        if len(parts[i]) == 2 and parts[i].upper() in US_STATES:
+            return US_STATES[parts.pop(i).upper()]
+    for i in reversed(range(len(parts))):
+        if parts[i].casefold() in US_STATE_NAMES:
+            return US_STATE_NAMES[parts.pop(i).casefold()]
+    return None
+
+
+def _clean(value: str) -> str | None:
+    """Strip surrounding whitespace and collapse repeated spaces."""
+    value = re.sub(r"\s+", " ", value).strip()
+    return value or None
@@ -6,14 +6,14 @@ import subprocess
 SEQUENCE_TYPE_COLUMN = 2
 
 
-def perform_mlst(scheme: str) -> pd.DataFrame:
+def perform_mlst(scheme: str, directory: str = "genomes") -> pd.DataFrame:
     logging.info("Performing MLST...")
     mlst_command = f"""
         mlst \
         --scheme {scheme} \
         --legacy \
         --quiet \
-        genomes/ncbi_dataset/*/*/* \
+        {directory}/ncbi_dataset/*/*/* \
         > mlst.tsv
     """
     subprocess.run(mlst_command, check=True, shell=True)
@@ -37,6 +37,9 @@ def merge_with_metadata(mlst_df: pd.DataFrame, metadata_df: pd.DataFrame) -> pd.
         "source_database": "source_database",
         "organism": "organism",
         "location": "location",
+        "country": "country",
+        "region": "region",
+        "locality": "locality",
         "collection_date": "collection_date",
         "SCHEME": "scheme",
         "ST": "sequence_type",
@@ -2,6 +2,8 @@ import json
 import pandas as pd
 
 from . import filters
+from . import identity
+from . import locations
 
 def create_counts_json(
         metadata_df: pd.DataFrame,
@@ -22,10 +24,8 @@ def create_counts_json(
     else:
         cached_filtered_matches = cached_df.shape[0]
         cached_unfiltered_matches = filtered_cached_df.shape[0]
-    mask = ~(metadata_df["biosample"].isin(cached_df["biosample"]))
-    uncached_df = metadata_df.loc[mask]
-    mask = ~(filtered_metadata_df["biosample"].isin(filtered_cached_df["biosample"]))
-    uncached_filtered_df = filtered_metadata_df.loc[mask]
+    uncached_df = identity.get_untyped(metadata_df, cached_df)
+    uncached_filtered_df = identity.get_untyped(filtered_metadata_df, cached_df)
 
     counts = {}
     counts["typed"] = {}
@@ -33,7 +33,9 @@ def create_counts_json(
     counts["typed"]["unfiltered_matches"] = cached_unfiltered_matches
     counts["typed"]["filtered_overall"] = filtered_cached_df.shape[0]
     counts["typed"]["unfiltered_overall"] = cached_df.shape[0]
+    counts["typed"]["filtered_by_country"] = locations.count_by_country(filtered_cached_df)
     counts["untyped"] = {}
     counts["untyped"]["filtered_overall"] = uncached_filtered_df.shape[0]
     counts["untyped"]["unfiltered_overall"] = uncached_df.shape[0]
+    counts["untyped"]["filtered_by_country"] = locations.count_by_country(uncached_filtered_df)
     return json.dumps(counts, indent=2)
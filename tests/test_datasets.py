@@ -46,6 +46,28 @@ class TestReport:
         assert len(filtered_report.records) == 1
         assert filtered_report.records[0]["assembly_info"]["biosample"]["attributes"][0]["value"] == "USA"
 
+    def test_filter_by_location_with_country_alias(self):
+        records = self.build_records_from_locations(["United States: Dallas, TX", "USA", "Canada"])
+        report = Report(records=records)
+        filtered_report = report.filter_by_location("USA")
+        assert len(filtered_report.records) == 2
+
+    def test_filter_by_location_with_region(self):
+        records = self.build_records_from_locations(
+            ["USA: Philadelphia, PA", "USA: Pennsylvania", "USA: Dallas, TX", "USA"])
+        report = Report(records=records)
+        filtered_report = report.filter_by_location("USA: PA")
+        assert len(filtered_report.records) == 2
+        filtered_report = report.filter_by_location("USA: Philadelphia, Pennsylvania")
+        assert len(filtered_report.records) == 1
+
+    def test_filter_by_location_with_locality_only(self):
+        records = self.build_records_from_locations(
+            ["USA: Philadelphia, PA", "USA: Philadelphia", "USA: Dallas"])
+        report = Report(records=records)
+        filtered_report = report.filter_by_location("USA: Philadelphia")
+        assert len(filtered_report.records) == 2
+
     def test_filter_by_year(self):
         records = self.build_records_from_dates(["2022-01-01", "2023-01-01"])
         report = Report(records=records)
@@ -99,4 +121,13 @@ class TestReport:
             record = {
                 "assembly_info": {"biosample": {"attributes": [{"name": "collection_date", "value": date}]}}}
             records.append(record)
-        return records
\ No newline at end of file
+        return records
+
+    def build_records_from_locations(self, locations):
+        """Helper method for creating record lists with geo_loc_name values"""
+        records = []
+        for location in locations:
+            record = {
+                "assembly_info": {"biosample": {"attributes": [{"name": "geo_loc_name", "value": location}]}}}
+            records.append(record)
+        return records
@@ -0,0 +1,151 @@
+import pandas as pd
+import pytest
+from argparse import Namespace
+from unittest.mock import call, patch
+from src.mlstseeker.fetch import MatchWriter, sort, stream_matches
+
+class TestFetch:
+
+    def build_matches(self, accessions, dates):
+        """Helper method for creating match DataFrames more easily"""
+        return pd.DataFrame({"accession": accessions, "collection_date": dates}, dtype="string")
+
+    def test_write_header_once(self, capsys):
+        writer = MatchWriter()
+        writer.write(self.build_matches(["GCA_1.1"], ["2020"]))
+        writer.write(self.build_matches(["GCA_2.1"], ["2021"]))
+        lines = capsys.readouterr().out.splitlines()
+        assert lines == ["accession\tcollection_date", "GCA_1.1\t2020", "GCA_2.1\t2021"]
+        assert writer.count == 2
+
+    def test_write_with_limit(self, capsys):
+        writer = MatchWriter(limit=2)
+        written = writer.write(self.build_matches(["GCA_1.1"], ["2020"]))
+        assert written.shape[0] == 1 and not writer.done
+        written = writer.write(self.build_matches(["GCA_2.1", "GCA_3.1"], ["2021", "2022"]))
+        assert written["accession"].to_list() == ["GCA_2.1"]
+        assert writer.done
+        assert writer.write(self.build_matches(["GCA_4.1"], ["2023"])).empty
+        assert len(capsys.readouterr().out.splitlines()) == 3
+
+    def test_write_with_columns(self, capsys):
+        writer = MatchWriter(columns=["accession", "last_updated"])
+        writer.write(self.build_matches(["GCA_1.1"], ["2020"]))
+        lines = capsys.readouterr().out.splitlines()
+        assert lines == ["accession\tlast_updated", "GCA_1.1\t"]
+
+    def test_sort_newest(self):
+        matches = self.build_matches(["GCA_1.1", "GCA_2.1", "GCA_3.1"], ["2019", "missing", "2021-05-01"])
+        assert sort(matches, "newest")["accession"].to_list() == ["GCA_3.1", "GCA_1.1", "GCA_2.1"]
+        assert sort(matches, "oldest")["accession"].to_list() == ["GCA_1.1", "GCA_3.1", "GCA_2.1"]
+        assert sort(matches, None)["accession"].to_list() == ["GCA_1.1", "GCA_2.1", "GCA_3.1"]
+
+    @pytest.fixture
+    def metadata_df(self):
+        accessions = [f"GCA_{i:09}.1" for i in range(60)]
+        return pd.DataFrame({
+            "accession": accessions,
+            "biosample": [f"SAMN{i}" for i in range(60)],
+            "source_database": "SOURCE_DATABASE_GENBANK",
+            "organism": "Mycobacteroides abscessus",
+            "location": "USA",
+            "country": "USA",
+            "region": None,
+            "locality": None,
+            "collection_date": [str(2000 + i) for i in range(60)],
+        }, dtype="string")
+
+    @pytest.fixture
+    def cached_df(self, metadata_df):
+        cached_df = metadata_df.iloc[:2].copy()
+        cached_df["scheme"] = "mabscessus"
+        cached_df["sequence_type"] = ["5", "7"]
+        cached_df["last_updated"] = "2024-01-01"
+        return cached_df
+
+    @pytest.fixture
+    def genomes_dir(self, tmp_path, monkeypatch):
+        """Write genomes to a temporary directory instead of ./genomes"""
+        genomes_dir = str(tmp_path / "genomes")
+        monkeypatch.setattr("src.mlstseeker.fetch.GENOMES_DIR", genomes_dir)
+        return genomes_dir
+
+    def run_stream(self, metadata_df, cached_df, matching, **kwargs):
+        """Helper method for running stream_matches with downloads and MLST
+        patched. Genomes whose accession is in `matching` are typed as ST5.
+        Returns the TSV lines written and the mocks.
+        """
+        options = Namespace(type="5", scheme="mabscessus", limit=None, sort=None, cached_only=False)
+        vars(options).update(kwargs)
+        downloaded = []
+
+        def get_genomes(accessions, directory="genomes", clear=True):
+            downloaded.append(accessions)
+
+        def perform_mlst(scheme, directory="genomes"):
+            batch = downloaded[-1]
+            return pd.DataFrame({
+                "FILE": batch,
+                "SCHEME": scheme,
+                "ST": ["5" if a in matching else "9" for a in batch],
+                "accession": batch,
+            }, dtype="string")
+
+        with patch("src.mlstseeker.fetch.datasets.get_genomes", side_effect=get_genomes) as mock_get, \
+                patch("src.mlstseeker.fetch.mlst.perform_mlst", side_effect=perform_mlst) as mock_mlst, \
+                patch("src.mlstseeker.fetch.datasets.move_genomes") as mock_move:
+            stream_matches(options, metadata_df, cached_df, metadata_df, cached_df)
+        return downloaded, mock_get, mock_mlst, mock_move
+
+    def test_stream_cached_first(self, metadata_df, cached_df, genomes_dir, capsys):
+        matching = {"GCA_000000010.1", "GCA_000000040.1"}
+        _, mock_get, mock_mlst, mock_move = self.run_stream(metadata_df, cached_df, matching)
+        lines = capsys.readouterr().out.splitlines()
+        assert [line.split("\t")[0] for line in lines[1:]] == [
+            "GCA_000000000.1", "GCA_000000010.1", "GCA_000000040.1"]
+        assert mock_get.call_args_list[0] == call(["GCA_000000000.1"], genomes_dir, clear=False)
+        assert mock_mlst.call_count == 3  # 58 untyped genomes in batches of 25
+        moved = [c.args[0] for c in mock_move.call_args_list]
+        assert moved == [["GCA_000000010.1"], ["GCA_000000040.1"], []]
+
+    def test_stream_stops_at_limit(self, metadata_df, cached_df, genomes_dir, capsys):
+        matching = {"GCA_000000010.1", "GCA_000000040.1"}
+        _, mock_get, mock_mlst, _ = self.run_stream(metadata_df, cached_df, matching, limit=2)
+        lines = capsys.readouterr().out.splitlines()
+        assert len(lines) == 3
+        assert mock_mlst.call_count == 1
+        assert mock_get.call_count == 2  # cached matches, then one batch to type
+
+    def test_stream_limit_reached_by_cache(self, metadata_df, cached_df, genomes_dir, capsys):
+        _, mock_get, mock_mlst, _ = self.run_stream(metadata_df, cached_df, set(), limit=1)
+        assert len(capsys.readouterr().out.splitlines()) == 2
+        assert mock_get.call_count == 1
+        mock_mlst.assert_not_called()
+
+    def test_stream_cached_only(self, metadata_df, cached_df, genomes_dir, capsys):
+        _, _, mock_mlst, _ = self.run_stream(metadata_df, cached_df, set(), cached_only=True)
+        assert len(capsys.readouterr().out.splitlines()) == 2
+        mock_mlst.assert_not_called()
+
+    def test_stream_keeps_cached_without_biosample(self, metadata_df, cached_df, genomes_dir, capsys):
+        metadata_df.loc[[0, 59], "biosample"] = pd.NA
+        cached_df.loc[0, "biosample"] = pd.NA
+        self.run_stream(metadata_df, cached_df, set(), limit=1)
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[1].split("\t")[0] == "GCA_000000000.1"
+
+    def test_stream_replaces_cached_with_new_version(self, metadata_df, cached_df, genomes_dir, capsys):
+        new_version = metadata_df.iloc[[0]].copy()
+        new_version["accession"] = "GCA_000000000.2"
+        metadata_df = pd.concat([new_version, metadata_df.iloc[1:]], ignore_index=True)
+        # new version typed as a match replaces the cached result
+        self.run_stream(metadata_df, cached_df, {"GCA_000000000.2"})
+        lines = capsys.readouterr().out.splitlines()
+        assert [line.split("\t")[0] for line in lines[1:]] == ["GCA_000000000.2"]
+        # new version typed as another sequence type drops the cached result
+        self.run_stream(metadata_df, cached_df, set())
+        assert capsys.readouterr().out == ""
+        # cached result is kept when the new version is not typed
+        self.run_stream(metadata_df, cached_df, set(), cached_only=True)
+        lines = capsys.readouterr().out.splitlines()
+        assert [line.split("\t")[0] for line in lines[1:]] == ["GCA_000000000.1"]
@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+from src.mlstseeker.identity import dedupe_typed, get_untyped, select_best
+
+class TestIdentity:
+
+    @pytest.fixture
+    def metadata_df(self):
+        return pd.DataFrame({
+            "accession": ["GCA_000000001.1", "GCA_000000001.2", "GCA_000000002.1", "GCA_000000003.1"],
+            "biosample": ["SAMN1", "SAMN1", "SAMN1", "SAMN2"],
+            "release_date": ["2020-01-01", "2021-01-01", "2019-01-01", "2020-01-01"],
+            "assembly_level": ["Contig", "Contig", "Complete Genome", "Contig"],
+            "contig_n50": ["500", "600", "5000000", "400"],
+        }, dtype="string")
+
+    def test_select_best_latest(self, metadata_df):
+        best_df = select_best(metadata_df, "latest")
+        assert best_df["accession"].to_list() == ["GCA_000000001.2", "GCA_000000003.1"]
+
+    def test_select_best_complete(self, metadata_df):
+        best_df = select_best(metadata_df, "complete")
+        assert best_df["accession"].to_list() == ["GCA_000000002.1", "GCA_000000003.1"]
+
+    def test_select_best_invalid_policy(self, metadata_df):
+        with pytest.raises(ValueError, match="Invalid assembly policy"):
+            select_best(metadata_df, "invalid")
+
+    def test_get_untyped_new_version(self, metadata_df):
+        cached_df = pd.DataFrame({
+            "accession": ["GCA_000000001.1", "GCA_000000003.1"],
+            "biosample": ["SAMN1", "SAMN2"],
+        }, dtype="string")
+        untyped_df = get_untyped(select_best(metadata_df, "latest"), cached_df)
+        assert untyped_df["accession"].to_list() == ["GCA_000000001.2"]
+
+    def test_get_untyped_other_assembly(self, metadata_df):
+        cached_df = pd.DataFrame({
+            "accession": ["GCA_000000001.1", "GCA_000000003.1"],
+            "biosample": ["SAMN1", "SAMN2"],
+        }, dtype="string")
+        untyped_df = get_untyped(select_best(metadata_df, "complete"), cached_df)
+        assert untyped_df.empty
+
+    def test_get_untyped_no_cache(self, metadata_df):
+        untyped_df = get_untyped(metadata_df, None)
+        assert untyped_df.shape[0] == 4
+
+    def test_dedupe_typed(self):
+        typed_df = pd.DataFrame({
+            "accession": ["GCA_000000001.1", "GCA_000000001.2", "GCA_000000003.1"],
+            "biosample": ["SAMN1", "SAMN1", "SAMN2"],
+        }, dtype="string")
+        deduped_df = dedupe_typed(typed_df)
+        assert deduped_df["accession"].to_list() == ["GCA_000000001.2", "GCA_000000003.1"]
+
+    def test_dedupe_typed_different_assemblies(self):
+        typed_df = pd.DataFrame({
+            "accession": ["GCA_000000001.1", "GCA_000000002.2", "GCA_000000002.1"],
+            "biosample": ["SAMN1", "SAMN1", "SAMN1"],
+            "last_updated": [
+                "2025-01-01 00:00:00.000000+00:00",
+                "2019-01-01 00:00:00.000000+00:00",
+                "2018-01-01 00:00:00.000000+00:00",
+            ],
+        }, dtype="string")
+        deduped_df = dedupe_typed(typed_df)
+        assert deduped_df["accession"].to_list() == ["GCA_000000001.1"]
+        metadata_df = pd.DataFrame({"accession": ["GCA_000000001.2"], "biosample": ["SAMN1"]}, dtype="string")
+        assert get_untyped(metadata_df, typed_df)["accession"].to_list() == ["GCA_000000001.2"]
@@ -0,0 +1,83 @@
+import pandas as pd
+import pytest
+from src.mlstseeker import filters
+from src.mlstseeker.locations import LocationIndex, count_by_country, normalize, parse
+
+class TestLocations:
+
+    @pytest.fixture
+    def locations_df(self):
+        return pd.DataFrame({"location": [
+            "USA: Philadelphia, PA",
+            "USA: Dallas, TX",
+            "USA: Philadelphia",
+            "United States",
+            "Canada: Ontario",
+            None,
+        ]}, dtype="string")
+
+    @pytest.mark.parametrize("geo_loc_name, expected", [
+        ("United States of America", ("USA", None, None)),
+        ("U.S.A.", ("USA", None, None)),
+        ("England: London", ("United Kingdom", "England", "London")),
+        ("Scotland", ("United Kingdom", "Scotland", None)),
+        ("Canada: Ontario, Toronto", ("Canada", "Ontario", "Toronto")),
+        ("  Viet  Nam :  Hanoi ", ("Viet Nam", "Hanoi", None)),
+    ])
+    def test_parse_aliases(self, geo_loc_name, expected):
+        assert parse(geo_loc_name) == expected
+
+    @pytest.mark.parametrize("geo_loc_name", [None, pd.NA, "", "missing", "Not Collected", "unknown", "N/A"])
+    def test_parse_null_values(self, geo_loc_name):
+        assert parse(geo_loc_name) == (None, None, None)
+
+    @pytest.mark.parametrize("geo_loc_name, expected", [
+        ("USA: Philadelphia, PA", ("USA", "Pennsylvania", "Philadelphia")),
+        ("USA: Washington, DC", ("USA", "District of Columbia", "Washington")),
+        ("USA: New York, NY", ("USA", "New York", "New York")),
+        ("USA: Indiana, PA", ("USA", "Pennsylvania", "Indiana")),
+        ("USA: Texas, Dallas", ("USA", "Texas", "Dallas")),
+        ("USA: Philadelphia", ("USA", None, "Philadelphia")),
+    ])
+    def test_parse_us_states(self, geo_loc_name, expected):
+        assert parse(geo_loc_name) == expected
+
+    def test_normalize(self, locations_df):
+        df = normalize(locations_df)
+        assert df["country"].to_list() == ["USA", "USA", "USA", "USA", "Canada", pd.NA]
+        assert df["region"].to_list() == ["Pennsylvania", "Texas", pd.NA, pd.NA, "Ontario", pd.NA]
+        assert df["locality"].to_list() == ["Philadelphia", "Dallas", "Philadelphia", pd.NA, pd.NA, pd.NA]
+
+    def test_normalize_keeps_existing_columns(self, locations_df):
+        df = normalize(locations_df)
+        df.loc[0, "region"] = "Keystone State"
+        assert normalize(df).loc[0, "region"] == "Keystone State"
+
+    @pytest.mark.parametrize("location, expected", [
+        ("USA", [0, 1, 2, 3]),
+        ("United States", [0, 1, 2, 3]),
+        ("USA: PA", [0]),
+        ("USA: Pennsylvania", [0]),
+        ("USA: Philadelphia", [0, 2]),
+        ("USA: Philadelphia, PA", [0]),
+        ("USA: Dallas", [1]),
+        ("USA: Boston", []),
+        ("Mexico", []),
+    ])
+    def test_location_index_lookup(self, locations_df, location, expected):
+        index = LocationIndex(locations_df)
+        assert sorted(index.lookup(location)) == expected
+
+    def test_filter_by_location(self, locations_df):
+        filtered = filters.filter_by_location(locations_df, "USA: Philadelphia")
+        assert filtered["location"].to_list() == ["USA: Philadelphia, PA", "USA: Philadelphia"]
+
+    def test_filter_by_location_with_index(self, locations_df):
+        index = LocationIndex(locations_df)
+        subset_df = locations_df.iloc[1:]
+        filtered = filters.filter_by_location(subset_df, "USA: PA", index)
+        assert filtered.empty
+
+    def test_count_by_country(self, locations_df):
+        counts = count_by_country(normalize(locations_df))
+        assert counts == {"USA": 4, "Canada": 1, "missing": 1}